@@ -0,0 +1,623 @@
+"""
+PoA relayer for the GeneralisedIncentives mock message escrow.
+
+Polls every configured chain for `Message` events emitted by the escrow,
+attests each message with the trusted PoA key and submits the signed message
+to the escrow on the destination chain. Intended for development and testnet
+environments where a single trusted signer attests cross-chain messages.
+
+Chains are configured as a dict of:
+
+    {
+        "<name>": {
+            "url": <json-rpc endpoint>,
+            "GI": <escrow address>,
+            "key": <relayer private key>,
+            "chain_identifier": <bytes32 identifier used in payloads>,
+            "confirmations": <blocks to wait before attesting>,
+        },
+        ...
+    }
+"""
+
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+
+import requests
+from coincurve import PrivateKey
+from eth_abi import encode
+from web3 import Web3
+from web3.middleware import ExtraDataToPOAMiddleware
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("relayer")
+
+
+GI_ABI = [
+    {
+        "type": "event",
+        "name": "Message",
+        "anonymous": False,
+        "inputs": [
+            {"name": "destinationIdentifier", "type": "bytes32", "indexed": True},
+            {"name": "message", "type": "bytes", "indexed": False},
+        ],
+    },
+    {
+        "type": "function",
+        "name": "processMessage",
+        "stateMutability": "payable",
+        "inputs": [
+            {"name": "signature", "type": "bytes"},
+            {"name": "message", "type": "bytes"},
+            {"name": "feeRecipient", "type": "bytes32"},
+        ],
+        "outputs": [],
+    },
+]
+
+# Multicall3 (https://github.com/mds1/multicall) is deployed at the same
+# address on most chains; configure it per chain as "multicall" to enable
+# batched submission of several messages in one transaction.
+MULTICALL3_ABI = [
+    {
+        "type": "function",
+        "name": "aggregate3",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    }
+]
+
+# keccak topic of Message(bytes32,bytes), computed once so both the
+# eth_getLogs filter and the receipt walk can match on it directly.
+MESSAGE_TOPIC0 = Web3.keccak(text="Message(bytes32,bytes)")
+
+
+# Payload helpers **************************************************************
+# See src/CatalystPayload.sol for the byte layout.
+
+CTX0_ASSET_SWAP = 0
+CTX1_LIQUIDITY_SWAP = 1
+
+# The payloads are fixed-shape byte strings, so the fields are packed and
+# unpacked with precompiled struct layouts instead of going through the
+# eth_abi codec (which parses a type string and allocates intermediate
+# buffers on every call).
+_ADDRESS_PAD = bytes(44)
+
+# One precompiled layout per context: a single C-level pack/parse replaces
+# the per-field concatenations and slices (each allocating a fresh bytes)
+# the codec-based path used to do.
+_CTX0_LAYOUT = struct.Struct(">B65s65s65s32sB32s32s65sIHH")
+_CTX1_LAYOUT = struct.Struct(">B65s65s65s32s32s32s32sIH")
+
+
+def convert_64_bytes_address(address: str) -> bytes:
+    """Encode an EVM address as the 65 byte Catalyst address format."""
+    return b"\x14" + _ADDRESS_PAD + bytes.fromhex(address[2:])
+
+
+def payloadConstructor(
+    fromVault: bytes,
+    toVault: bytes,
+    toAccount: bytes,
+    U: int,
+    assetIndex: int = 0,
+    minOut: int = 0,
+    fromAmount: int = 0,
+    fromAsset: bytes = bytes(65),
+    blockNumber: int = 0,
+    underwriteIncentive: int = 0,
+    data: bytes = b"",
+) -> bytes:
+    """Construct a CTX0 (asset swap) payload. Addresses are 65 byte encoded."""
+    return (
+        _CTX0_LAYOUT.pack(
+            CTX0_ASSET_SWAP,
+            fromVault,
+            toVault,
+            toAccount,
+            U.to_bytes(32, "big"),
+            assetIndex,
+            minOut.to_bytes(32, "big"),
+            fromAmount.to_bytes(32, "big"),
+            fromAsset,
+            blockNumber,
+            underwriteIncentive,
+            len(data),
+        )
+        + data
+    )
+
+
+def liquidityPayloadConstructor(
+    fromVault: bytes,
+    toVault: bytes,
+    toAccount: bytes,
+    U: int,
+    minVaultTokens: int = 0,
+    minReferenceAsset: int = 0,
+    fromAmount: int = 0,
+    blockNumber: int = 0,
+    data: bytes = b"",
+) -> bytes:
+    """Construct a CTX1 (liquidity swap) payload. Addresses are 65 byte encoded."""
+    return (
+        _CTX1_LAYOUT.pack(
+            CTX1_LIQUIDITY_SWAP,
+            fromVault,
+            toVault,
+            toAccount,
+            U.to_bytes(32, "big"),
+            minVaultTokens.to_bytes(32, "big"),
+            minReferenceAsset.to_bytes(32, "big"),
+            fromAmount.to_bytes(32, "big"),
+            blockNumber,
+            len(data),
+        )
+        + data
+    )
+
+
+def decodePayload(data: bytes) -> dict:
+    """Decode a Catalyst payload into its fields."""
+    mv = memoryview(data)
+    context = mv[0]
+    if context == CTX0_ASSET_SWAP:
+        (
+            _,
+            fromVault,
+            toVault,
+            toAccount,
+            U,
+            assetIndex,
+            minOut,
+            fromAmount,
+            fromAsset,
+            blockNumber,
+            underwriteIncentive,
+            dataLength,
+        ) = _CTX0_LAYOUT.unpack_from(mv)
+        return {
+            "context": context,
+            "fromVault": fromVault,
+            "toVault": toVault,
+            "toAccount": toAccount,
+            "U": int.from_bytes(U, "big"),
+            "assetIndex": assetIndex,
+            "minOut": int.from_bytes(minOut, "big"),
+            "fromAmount": int.from_bytes(fromAmount, "big"),
+            "fromAsset": fromAsset,
+            "blockNumber": blockNumber,
+            "underwriteIncentive": underwriteIncentive,
+            "data": bytes(mv[366 : 366 + dataLength]),
+        }
+    if context == CTX1_LIQUIDITY_SWAP:
+        (
+            _,
+            fromVault,
+            toVault,
+            toAccount,
+            U,
+            minVaultTokens,
+            minReferenceAsset,
+            fromAmount,
+            blockNumber,
+            dataLength,
+        ) = _CTX1_LAYOUT.unpack_from(mv)
+        return {
+            "context": context,
+            "fromVault": fromVault,
+            "toVault": toVault,
+            "toAccount": toAccount,
+            "U": int.from_bytes(U, "big"),
+            "minVaultTokens": int.from_bytes(minVaultTokens, "big"),
+            "minReferenceAsset": int.from_bytes(minReferenceAsset, "big"),
+            "fromAmount": int.from_bytes(fromAmount, "big"),
+            "blockNumber": blockNumber,
+            "data": bytes(mv[330 : 330 + dataLength]),
+        }
+    raise ValueError(f"Unknown payload context: {context}")
+
+
+# Relayer **********************************************************************
+
+
+class MessageSigner:
+    def __init__(self, private_key: str):
+        self.private_key = private_key
+        # Sign through libsecp256k1 directly rather than eth_account's
+        # message-signing machinery; native secp256k1 is orders of magnitude
+        # faster than the pure Python fallback.
+        self.signer = PrivateKey(bytes.fromhex(private_key.replace("0x", "")))
+
+    def signMessage(self, message: bytes) -> bytes:
+        """Attest a message; returns the 65 byte v || r || s signature."""
+        sig = self.signer.sign_recoverable(sha256(message).digest(), hasher=None)
+        # coincurve returns r || s || recovery_id; the escrow expects
+        # v = recovery_id + 27 up front.
+        return bytes([sig[64] + 27]) + sig[:64]
+
+
+class PoARelayer(MessageSigner):
+    def __init__(self, private_key: str, chains: dict):
+        super().__init__(private_key)
+        self.chains = chains
+        # chain => (monotonic timestamp, block number). See _get_block_number.
+        self._blocknum_cache: dict[str, tuple[float, int]] = {}
+        # chain => (monotonic timestamp, gas price). See _get_gas_price.
+        self._gasprice_cache: dict[str, tuple[float, int]] = {}
+        # Retried logs (reorg backoff, failed sends) hit the same transaction
+        # again; cache the attestations so the receipt fetch and the ECDSA
+        # work are only paid once per transaction. Cleared on reorgs.
+        self._sign_tx_cached = functools.lru_cache(maxsize=4096)(
+            self._sign_transaction
+        )
+        # Pollers for different source chains run concurrently and may both
+        # submit to the same destination chain; serialize nonce allocation.
+        self._nonce_lock = {chain: threading.Lock() for chain in chains}
+        # Submissions to a chain are independent once a nonce is allocated,
+        # so each chain gets a bounded worker pool that overlaps the
+        # CPU-bound transaction signing with the network-bound broadcasts.
+        self._pools = {
+            chain: ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix=f"relayer-{chain}"
+            )
+            for chain in chains
+        }
+
+        for chain in self.chains.keys():
+            # One keep-alive session per chain so the TCP/TLS handshake is
+            # paid once per provider instead of per request; the pool is
+            # sized for the poller plus the chain's submission workers.
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=32, pool_maxsize=32
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.chains[chain]["session"] = session
+            w3 = Web3(
+                Web3.HTTPProvider(
+                    self.chains[chain]["url"],
+                    request_kwargs={"timeout": 10},
+                    session=session,
+                )
+            )
+            w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            self.chains[chain]["w3"] = w3
+            self.chains[chain]["GI"] = w3.eth.contract(
+                address=self.chains[chain]["GI"], abi=GI_ABI
+            )
+            # The address/topic part of the log filter never changes, so it
+            # is built once here; fetch_logs only fills in the block range.
+            self.chains[chain]["msg_filter"] = {
+                "address": self.chains[chain]["GI"].address,
+                "topics": [MESSAGE_TOPIC0],
+            }
+            if "multicall" in self.chains[chain]:
+                self.chains[chain]["multicall"] = w3.eth.contract(
+                    address=self.chains[chain]["multicall"], abi=MULTICALL3_ABI
+                )
+            relayer_account = w3.eth.account.from_key(self.chains[chain]["key"])
+            self.chains[chain]["relayer"] = relayer_account.address
+            # sign_transaction(tx, private_key=...) re-parses the key (and
+            # re-derives the address) per call; keep the LocalAccount and
+            # sign through it instead.
+            self.chains[chain]["signer_account"] = relayer_account
+            self.chains[chain]["nonce"] = w3.eth.get_transaction_count(
+                relayer_account.address
+            )
+            # processMessage cost is bounded and known, so outbound
+            # transactions are built locally from these instead of letting
+            # build_transaction issue eth_chainId/eth_estimateGas/eth_gasPrice
+            # round-trips per transaction.
+            self.chains[chain]["chainId"] = w3.eth.chain_id
+            self.chains[chain]["gas_limit"] = self.chains[chain].get(
+                "gas_limit", 1_000_000
+            )
+            # Upper bound for any single transaction; batched submissions
+            # are chunked so they never exceed it (most chains reject
+            # transactions above the block gas limit outright).
+            self.chains[chain]["max_gas"] = self.chains[chain].get(
+                "max_gas", 15_000_000
+            )
+
+    def chainFromIdentifier(self, chainIdentifier: bytes) -> str:
+        for chain in self.chains.keys():
+            if self.chains[chain]["chain_identifier"] == chainIdentifier:
+                return chain
+        raise KeyError(f"No chain configured for identifier {chainIdentifier.hex()}")
+
+    def _get_block_number(self, chain: str) -> int:
+        """Return the chain head, cached for half a block time.
+
+        Polling faster than blocks are produced only burns RPC quota, so
+        eth_blockNumber reads within the TTL are elided and served from the
+        cache. The cache is refreshed by fetch_logs and invalidated whenever
+        a transaction is broadcast to the chain.
+        """
+        ttl = self.chains[chain].get("block_time", 2.0) / 2
+        cached = self._blocknum_cache.get(chain)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        head = self.chains[chain]["w3"].eth.block_number
+        self._blocknum_cache[chain] = (time.monotonic(), head)
+        return head
+
+    def _get_gas_price(self, chain: str) -> int:
+        """Return the chain gas price, cached for gas_price_ttl seconds."""
+        ttl = self.chains[chain].get("gas_price_ttl", 30.0)
+        cached = self._gasprice_cache.get(chain)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        price = self.chains[chain]["w3"].eth.gas_price
+        self._gasprice_cache[chain] = (time.monotonic(), price)
+        return price
+
+    def fetch_logs(self, chain: str, fromBlock: int, toBlock=None):
+        """Fetch new escrow logs in a single JSON-RPC batch.
+
+        The block range is split into log_window sized chunks (default 1024
+        blocks) issued together as one batch. A tick still costs one
+        round-trip per chain however far the relayer has fallen behind, the
+        node can serve the window lookups in parallel, and no single
+        eth_getLogs response grows unbounded after a restart.
+
+        Returns (toBlock, logs).
+        """
+        chain_meta = self.chains[chain]
+        w3 = chain_meta["w3"]
+        if toBlock is None:
+            toBlock = self._get_block_number(chain)
+        if toBlock < fromBlock:
+            return toBlock, []
+
+        window = chain_meta.get("log_window", 1024)
+        msg_filter = chain_meta["msg_filter"]
+        with w3.batch_requests() as batch:
+            for start in range(fromBlock, toBlock + 1, window):
+                batch.add(
+                    w3.eth.get_logs(
+                        {
+                            **msg_filter,
+                            "fromBlock": start,
+                            "toBlock": min(start + window - 1, toBlock),
+                        }
+                    )
+                )
+            results = batch.execute()
+        # Heads observed by the poll loop double as the confirmation
+        # reference for the signing path; see _sign_transaction.
+        chain_meta["confirmed_head"] = toBlock
+        return toBlock, list(itertools.chain.from_iterable(results))
+
+    def signTransaction(self, chainId: str, transactionHash: bytes) -> tuple:
+        """Sign every escrow message emitted by the given transaction.
+
+        Returns a tuple of (destinationIdentifier, message, signature) where
+        message is the emitter-prefixed message the escrow verifies against.
+        Results are cached per (chainId, transactionHash).
+        """
+        return self._sign_tx_cached(chainId, transactionHash)
+
+    def _sign_transaction(self, chainId: str, transactionHash: bytes) -> tuple:
+        # Bind the chain metadata once; re-indexing self.chains per field
+        # adds up at per-log call rates.
+        chain_meta = self.chains[chainId]
+        w3: Web3 = chain_meta["w3"]
+        GI = chain_meta["GI"]
+        confirmations = chain_meta.get("confirmations", 0)
+
+        transaction = w3.eth.get_transaction_receipt(transactionHash)
+        # The poll loop just observed the chain head, so the common case
+        # needs no extra eth_blockNumber round-trip; only fall back to live
+        # reads when the receipt is too fresh against the cached head.
+        head = chain_meta.get("confirmed_head", 0)
+        while head - transaction["blockNumber"] < confirmations:
+            time.sleep(1)
+            head = w3.eth.block_number
+            chain_meta["confirmed_head"] = head
+
+        signatures = []
+        for log in transaction["logs"]:
+            if log["address"] != GI.address or log["topics"][0] != MESSAGE_TOPIC0:
+                continue
+            # Message(bytes32 indexed destinationIdentifier, bytes message):
+            # the destination sits in topics[1] and the data holds a single
+            # dynamic bytes field, so slice the message out directly instead
+            # of running the ABI decoder for every log.
+            data = bytes(log["data"])
+            offset = int.from_bytes(data[:32], "big")
+            length = int.from_bytes(data[offset : offset + 32], "big")
+            message = data[offset + 32 : offset + 32 + length]
+
+            newMessage = bytes(12) + bytes.fromhex(log["address"][2:]) + message
+            signature = self.signMessage(newMessage)
+            signatures.append((bytes(log["topics"][1]), newMessage, signature))
+
+        return tuple(signatures)
+
+    def execute(self, toChain: str, message: bytes, signature: bytes):
+        """Submit a signed message to the escrow on the destination chain."""
+        chain_meta = self.chains[toChain]
+        w3: Web3 = chain_meta["w3"]
+        GI = chain_meta["GI"]
+        relayer = chain_meta["relayer"]
+
+        with self._nonce_lock[toChain]:
+            nonce = chain_meta["nonce"]
+            chain_meta["nonce"] += 1
+
+        tx = {
+            "to": GI.address,
+            "data": GI.encode_abi(
+                "processMessage", [signature, message, encode(["address"], [relayer])]
+            ),
+            "nonce": nonce,
+            "gas": chain_meta["gas_limit"],
+            "gasPrice": self._get_gas_price(toChain),
+            "chainId": chain_meta["chainId"],
+        }
+
+        signed_txn = chain_meta["signer_account"].sign_transaction(tx)
+        txhash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        # The broadcast advances the chain state; re-fetch the head next tick.
+        self._blocknum_cache.pop(toChain, None)
+        logger.info(f"Submitted message to {toChain}: {txhash.hex()}")
+        return txhash
+
+    def executeBatch(self, toChain: str, messages: list):
+        """Submit several signed messages to a chain in one transaction.
+
+        When the destination chain has a Multicall3 deployment configured,
+        the processMessage calls are aggregated into a single aggregate3
+        transaction: one signature, one nonce and one broadcast for the
+        whole burst. Falls back to per-message submission otherwise.
+        """
+        chain_meta = self.chains[toChain]
+        multicall = chain_meta.get("multicall")
+        if multicall is None or len(messages) == 1:
+            for message, signature in messages:
+                self.execute(toChain, message, signature)
+            return
+
+        # Keep every aggregate3 below the chain's max_gas: a large burst at
+        # gas_limit per call would otherwise exceed the block gas limit and
+        # get the whole batch rejected at broadcast.
+        batch_size = max(1, chain_meta["max_gas"] // chain_meta["gas_limit"])
+        if len(messages) > batch_size:
+            for i in range(0, len(messages), batch_size):
+                self.executeBatch(toChain, messages[i : i + batch_size])
+            return
+
+        w3: Web3 = chain_meta["w3"]
+        GI = chain_meta["GI"]
+        relayer = chain_meta["relayer"]
+        feeRecipient = encode(["address"], [relayer])
+
+        calls = [
+            (
+                GI.address,
+                False,
+                bytes.fromhex(
+                    GI.encode_abi("processMessage", [signature, message, feeRecipient])[
+                        2:
+                    ]
+                ),
+            )
+            for message, signature in messages
+        ]
+
+        with self._nonce_lock[toChain]:
+            nonce = chain_meta["nonce"]
+            chain_meta["nonce"] += 1
+
+        tx = {
+            "to": multicall.address,
+            "data": multicall.encode_abi("aggregate3", [calls]),
+            "nonce": nonce,
+            "gas": chain_meta["gas_limit"] * len(calls),
+            "gasPrice": self._get_gas_price(toChain),
+            "chainId": chain_meta["chainId"],
+        }
+        signed_txn = chain_meta["signer_account"].sign_transaction(tx)
+        txhash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        self._blocknum_cache.pop(toChain, None)
+        logger.info(f"Submitted {len(messages)} messages to {toChain}: {txhash.hex()}")
+        return txhash
+
+    async def _poll_chain(self, chain: str, fromBlock: dict):
+        head = await asyncio.to_thread(self._get_block_number, chain)
+        if head + 1 < fromBlock[chain]:
+            # The head moved backwards: a reorg. Cached attestations
+            # may reference orphaned blocks, so drop them and rewind.
+            self._sign_tx_cached.cache_clear()
+            fromBlock[chain] = head
+        elif head < fromBlock[chain]:
+            return
+        head, logs = await asyncio.to_thread(
+            self.fetch_logs, chain, fromBlock[chain]
+        )
+        # Group the attestations by destination so a burst of messages to
+        # the same chain goes out as one batched submission.
+        executes: dict = {}
+        for log in logs:
+            for destination, message, signature in await asyncio.to_thread(
+                self.signTransaction, chain, log["transactionHash"]
+            ):
+                executes.setdefault(destination, []).append((message, signature))
+        futures = []
+        for destination, messages in executes.items():
+            toChain = self.chainFromIdentifier(destination)
+            pool = self._pools[toChain]
+            if "multicall" in self.chains[toChain] and len(messages) > 1:
+                futures.append(pool.submit(self.executeBatch, toChain, messages))
+            else:
+                futures.extend(
+                    pool.submit(self.execute, toChain, message, signature)
+                    for message, signature in messages
+                )
+        for future in futures:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception:
+                logger.exception(f"Failed to submit message polled from {chain}")
+        fromBlock[chain] = head + 1
+
+    async def _run(self, wait: int):
+        fromBlock = {}
+        for chain in self.chains.keys():
+            fromBlock[chain] = self._get_block_number(chain)
+
+        while True:
+            await asyncio.gather(
+                *(self._poll_chain(chain, fromBlock) for chain in self.chains.keys())
+            )
+            await asyncio.sleep(wait)
+
+    def run(self, wait: int = 5):
+        """Poll all chains concurrently; one tick costs max(RTT), not sum."""
+        asyncio.run(self._run(wait))
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as f:
+        config = json.load(f)
+
+    chains = config["chains"]
+    for chain in chains.keys():
+        chains[chain]["chain_identifier"] = bytes.fromhex(
+            chains[chain]["chain_identifier"].replace("0x", "")
+        )
+
+    PoARelayer(config["private_key"], chains).run()